@@ -1,7 +1,7 @@
 import datetime
 import os
 import enum
-from sqlalchemy import create_engine, ForeignKey, Column, String, Integer, Enum, DateTime
+from sqlalchemy import create_engine, event, select, func, Identity, ForeignKey, Column, String, Integer, Float, Enum, DateTime, JSON, Text
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session 
@@ -48,6 +48,11 @@ class BookingStatus(str, enum.Enum):
     COMPLETED = "completed"
     CANCELED = "canceled"
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    DONE = "done"
+    FAILED = "failed"
+
 # Database models
 class User(Base):
     __tablename__ = 'users'
@@ -81,10 +86,14 @@ class Service(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String, nullable=True)
-    owner_id = Column(Integer, ForeignKey('users.id'))
-    category_id = Column(Integer, ForeignKey('service_categories.id'))  # Ensure this line exists
+    owner_id = Column(Integer, ForeignKey('users.id'), index=True)
+    category_id = Column(Integer, ForeignKey('service_categories.id'), index=True)  # Ensure this line exists
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     status = Column(Enum(ServiceStatus), default=ServiceStatus.OPEN)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    # Geohash of (latitude, longitude), the indexed prefilter for /services/nearby
+    geohash = Column(String(12), nullable=True, index=True)
 
     owner = relationship('User', back_populates='services')
     category = relationship('ServiceCategoryModel', back_populates='services')
@@ -95,12 +104,17 @@ class Service(Base):
 
 class Booking(Base):
     __tablename__ = 'bookings'
+    # Monthly partitions are managed by config/partitions.py and maintenance.py;
+    # Postgres requires the partition key in the primary key.
+    __table_args__ = {'postgresql_partition_by': 'RANGE (created_at)'}
 
-    id = Column(Integer, primary_key=True, index=True)
-    service_id = Column(Integer, ForeignKey('services.id'))
-    user_id = Column(Integer, ForeignKey('users.id'))
+    id = Column(Integer, Identity(), primary_key=True)
+    service_id = Column(Integer, ForeignKey('services.id'), index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     status = Column(Enum(BookingStatus), default=BookingStatus.PENDING)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, primary_key=True, default=datetime.datetime.utcnow)
 
     service = relationship('Service', back_populates='bookings')
     user = relationship('User', back_populates='bookings')
@@ -120,21 +134,82 @@ class Review(Base):
     user = relationship('User', back_populates='reviews')
 
 
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
 # Load environment variables
 def get_env_variable(var_name, default_value=None):
     """Get the environment variable or return a default value."""
     return os.getenv(var_name, default_value)
 
+# DATABASE_URL wins, then the POSTGRES_* variables, then a local SQLite file
+def get_database_url():
+    database_url = get_env_variable('DATABASE_URL')
+    if database_url:
+        return database_url
+    if get_env_variable('POSTGRES_HOST'):
+        return f"postgresql://{get_env_variable('POSTGRES_USER')}:{get_env_variable('POSTGRES_PASSWORD')}@{get_env_variable('POSTGRES_HOST')}:{get_env_variable('POSTGRES_PORT', '5432')}/{get_env_variable('POSTGRES_DBNAME')}"
+    return 'sqlite:///shaqool.db'
+
+# Connection pool per process; gunicorn.conf.py sizes it to the worker's threads
+def get_pool_options(database_url):
+    if database_url.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(get_env_variable('DB_POOL_SIZE', '5')),
+        'max_overflow': int(get_env_variable('DB_MAX_OVERFLOW', '10')),
+    }
+
 # Create engine and session
 engine = create_engine(
-    f"postgresql://{get_env_variable('POSTGRES_USER')}:{get_env_variable('POSTGRES_PASSWORD')}@{get_env_variable('POSTGRES_HOST')}:{get_env_variable('POSTGRES_PORT', '5432')}/{get_env_variable('POSTGRES_DBNAME')}",
-    echo=True
+    get_database_url(),
+    echo=get_env_variable('SQL_ECHO', 'true').lower() == 'true',
+    **get_pool_options(get_database_url())
 )
 
 Base.metadata.create_all(bind=engine)
 
+# Partitions and the other PostgreSQL-only objects of the bookings table are
+# created by `python maintenance.py migrate`, never at import. Until it has run,
+# inserts into bookings fail with "no partition of relation bookings found".
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# SQLite cannot autoincrement one column of a composite primary key, so the
+# bookings id is assigned here. This is only meant for local development.
+# Bookings flushed together are inserted together, after this hook has run for
+# each of them, so the last id handed out is remembered on the connection.
+@event.listens_for(Booking, 'before_insert')
+def assign_booking_id(mapper, connection, target):
+    if target.id is None and connection.dialect.name == 'sqlite':
+        stored = connection.execute(select(func.coalesce(func.max(Booking.id), 0))).scalar()
+        target.id = max(stored, connection.info.get('last_booking_id', 0)) + 1
+        connection.info['last_booking_id'] = target.id
+
+# Open up to `size` connections at once so the pool is full before traffic
+# arrives. Connections beyond the pool size would be discarded when returned.
+def warm_pool(size):
+    pool_size = engine.pool.size() if hasattr(engine.pool, 'size') else 0
+    connections = []
+    try:
+        for _ in range(min(size, pool_size)):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
 def insert_service_categories(session: Session):
     for category in ServiceCategoryEnum:
         existing_category = session.query(ServiceCategoryModel).filter(ServiceCategoryModel.name == category.value).first()
@@ -0,0 +1,77 @@
+import re
+import datetime
+from sqlalchemy import text
+
+# Monthly range partitions of the bookings table, named bookings_yYYYYmMM
+PARTITION_NAME = re.compile(r'^bookings_y(\d{4})m(\d{2})$')
+
+def month_start(value):
+    return datetime.datetime(value.year, value.month, 1)
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime.datetime(month_index // 12, month_index % 12 + 1, 1)
+
+def partition_name(start):
+    return f'bookings_y{start.year:04d}m{start.month:02d}'
+
+def partition_start(name):
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime.datetime(int(match.group(1)), int(match.group(2)), 1)
+
+def relation_exists(connection, name):
+    return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {'name': name}).scalar()
+
+def create_booking_partition(connection, start):
+    name = partition_name(start)
+    if relation_exists(connection, name):
+        return
+
+    end = add_months(start, 1)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    in_range = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+
+    stranded = relation_exists(connection, 'bookings_default') and connection.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM bookings_default WHERE {in_range})")
+    ).scalar()
+    if not stranded:
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF bookings FOR VALUES {bounds}"))
+        return
+
+    # Postgres refuses a range the default partition already holds rows for,
+    # so those rows move to the new partition while the default is detached
+    columns = ', '.join(row[0] for row in connection.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_name = 'bookings' AND table_schema = current_schema() ORDER BY ordinal_position"
+    )))
+    connection.execute(text("ALTER TABLE bookings DETACH PARTITION bookings_default"))
+    connection.execute(text(f"CREATE TABLE {name} PARTITION OF bookings FOR VALUES {bounds}"))
+    connection.execute(text(
+        f"INSERT INTO {name} ({columns}) SELECT {columns} FROM bookings_default WHERE {in_range}"
+    ))
+    connection.execute(text(f"DELETE FROM bookings_default WHERE {in_range}"))
+    connection.execute(text("ALTER TABLE bookings ATTACH PARTITION bookings_default DEFAULT"))
+
+# Create the partitions from `since` (default: this month) through the next
+# `months_ahead` months. Rows outside every monthly range land in
+# bookings_default until their month's partition is created.
+def ensure_booking_partitions(connection, months_ahead=3, since=None):
+    connection.execute(text("CREATE TABLE IF NOT EXISTS bookings_default PARTITION OF bookings DEFAULT"))
+    current = month_start(datetime.datetime.utcnow())
+    start = month_start(since) if since else current
+    last = add_months(current, months_ahead)
+    while start <= last:
+        create_booking_partition(connection, start)
+        start = add_months(start, 1)
+
+def list_booking_partitions(connection):
+    rows = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'bookings'"
+    ))
+    partitions = [(partition_start(row[0]), row[0]) for row in rows]
+    return sorted(partition for partition in partitions if partition[0] is not None)
@@ -0,0 +1,24 @@
+import os
+import multiprocessing
+
+# Production launcher: gunicorn -c gunicorn.conf.py
+wsgi_app = 'server:app'
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+
+# One pooled database connection per thread. This file is read before the
+# app is imported, so the engine picks the setting up.
+os.environ.setdefault('DB_POOL_SIZE', str(threads))
+
+# Import the app once in the master so workers share the loaded modules
+preload_app = True
+
+def post_fork(server, worker):
+    from server import warm_up
+    # One connection per thread, capped at the pool size by warm_pool
+    warm_up(threads)
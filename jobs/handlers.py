@@ -0,0 +1,16 @@
+from config.database import User, Service
+from jobs.queue import job
+
+# Deleting a user cascades to their services, reviews and bookings
+@job('delete_user')
+def delete_user(session, user_id):
+    user = session.query(User).filter(User.id == user_id).first()
+    if user:
+        session.delete(user)
+
+# Deleting a service cascades to its reviews and bookings
+@job('delete_service')
+def delete_service(session, service_id):
+    service = session.query(Service).filter(Service.id == service_id).first()
+    if service:
+        session.delete(service)
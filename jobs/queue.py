@@ -0,0 +1,81 @@
+import os
+import time
+import datetime
+import traceback
+from config.database import Job, JobStatus, SessionLocal
+
+JOB_RETRY_BASE_SECONDS = float(os.getenv('JOB_RETRY_BASE_SECONDS', '5'))
+JOB_RETRY_MAX_SECONDS = float(os.getenv('JOB_RETRY_MAX_SECONDS', '3600'))
+
+# Job name -> handler(session, **payload)
+HANDLERS = {}
+
+def job(name):
+    def register(handler):
+        HANDLERS[name] = handler
+        return handler
+    return register
+
+# Add a job to the session; it is queued when the caller commits
+def enqueue(session, name, **payload):
+    new_job = Job(name=name, payload=payload, status=JobStatus.QUEUED)
+    session.add(new_job)
+    return new_job
+
+def retry_delay(attempts):
+    return min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+# Run one due job, returns False when there was nothing to do.
+# The row stays locked until the job's outcome commits: the handler runs in a
+# savepoint, so its changes and the job status are committed together, a
+# failure rolls back only the handler's work, and a crashed worker releases the job.
+def run_next_job(session):
+    next_job = (
+        session.query(Job)
+        .filter(Job.status == JobStatus.QUEUED, Job.run_at <= datetime.datetime.utcnow())
+        .order_by(Job.run_at, Job.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if next_job is None:
+        session.rollback()
+        return False
+
+    try:
+        with session.begin_nested():
+            handler = HANDLERS.get(next_job.name)
+            if handler is None:
+                raise LookupError(f'No handler registered for job {next_job.name!r}')
+            handler(session, **next_job.payload)
+        failure = None
+    except Exception:
+        failure = traceback.format_exc()
+
+    now = datetime.datetime.utcnow()
+    next_job.attempts += 1
+    if failure is None:
+        next_job.status = JobStatus.DONE
+        next_job.finished_at = now
+    elif next_job.attempts >= next_job.max_attempts:
+        next_job.status = JobStatus.FAILED
+        next_job.last_error = failure
+        next_job.finished_at = now
+    else:
+        next_job.last_error = failure
+        next_job.run_at = now + datetime.timedelta(seconds=retry_delay(next_job.attempts))
+    session.commit()
+    return True
+
+def work(poll_interval=1.0, should_stop=lambda: False):
+    while not should_stop():
+        session = SessionLocal()
+        try:
+            ran = run_next_job(session)
+        except Exception as e:
+            print(f"Error running job: {e}")
+            session.rollback()
+            ran = False
+        finally:
+            session.close()
+        if not ran:
+            time.sleep(poll_interval)
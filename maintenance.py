@@ -0,0 +1,176 @@
+import os
+import csv
+import gzip
+import argparse
+import datetime
+from sqlalchemy import select, delete, func, text, inspect
+
+from config.database import engine, Base, Booking, BookingStatus
+from config.partitions import month_start, add_months, ensure_booking_partitions, list_booking_partitions
+
+CLOSED_STATUSES = [BookingStatus.COMPLETED, BookingStatus.CANCELED]
+
+
+# Availability lookups search bookings by service and time range.
+# An exclusion constraint cannot span the monthly partitions (it would have to
+# include created_at), so overlaps are prevented in create_booking instead.
+def ensure_booking_time_index(connection):
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_bookings_service_time ON bookings "
+        "USING gist (service_id, tsrange(start_time, end_time))"
+    ))
+
+# create_all only creates missing tables; add the columns and indexes that
+# later versions of the models introduced to tables that already exist
+def add_missing_columns_and_indexes(connection):
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                print(f"Added column {table.name}.{column.name}.")
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+# Replace an unpartitioned bookings table by the partitioned one, keeping its rows
+def partition_existing_bookings(connection):
+    kind = connection.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('bookings')")).scalar()
+    if kind != 'r':
+        return
+
+    existing = {column['name'] for column in inspect(connection).get_columns('bookings')}
+    columns = [column.name for column in Booking.__table__.columns if column.name in existing]
+
+    connection.execute(text("ALTER TABLE bookings RENAME TO bookings_unpartitioned"))
+    connection.execute(text("ALTER TABLE bookings_unpartitioned RENAME CONSTRAINT bookings_pkey TO bookings_unpartitioned_pkey"))
+    # Index names are per schema, so the old ones must go before the new table is created
+    for (index_name,) in connection.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'bookings_unpartitioned' "
+        "AND indexname <> 'bookings_unpartitioned_pkey'"
+    )):
+        connection.execute(text(f"DROP INDEX {index_name}"))
+
+    Booking.__table__.create(connection)
+    oldest = connection.execute(text("SELECT MIN(created_at) FROM bookings_unpartitioned")).scalar()
+    ensure_booking_partitions(connection, since=oldest)
+
+    selected = [
+        "COALESCE(created_at, now() AT TIME ZONE 'utc')" if column == 'created_at' else column
+        for column in columns
+    ]
+    moved = connection.execute(text(
+        f"INSERT INTO bookings ({', '.join(columns)}) "
+        f"SELECT {', '.join(selected)} FROM bookings_unpartitioned"
+    )).rowcount
+    connection.execute(text(
+        "SELECT setval(pg_get_serial_sequence('bookings', 'id'), COALESCE((SELECT MAX(id) FROM bookings), 1))"
+    ))
+    connection.execute(text("DROP TABLE bookings_unpartitioned"))
+    print(f"Moved {moved} bookings into the partitioned bookings table.")
+
+# Bring an existing database up to the current models. Safe to run repeatedly.
+def migrate(months_ahead):
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+        if connection.dialect.name == 'postgresql':
+            partition_existing_bookings(connection)
+        add_missing_columns_and_indexes(connection)
+        if connection.dialect.name == 'postgresql':
+            ensure_booking_partitions(connection, months_ahead)
+            ensure_booking_time_index(connection)
+    print("Database migrated.")
+
+def create_partitions(months_ahead):
+    with engine.begin() as connection:
+        ensure_booking_partitions(connection, months_ahead)
+    print(f"Booking partitions ensured {months_ahead} months ahead.")
+
+# Write closed bookings older than the cutoff to gzip CSV files, delete them,
+# and detach and drop every partition left empty.
+# Each run writes new files, named after the partition and the run, so a retry
+# never appends to an earlier archive. A file is only renamed to its final
+# name once the delete has committed; a leftover .tmp file means the run
+# stopped in between and holds the only copy of the rows if the delete committed.
+def archive_bookings(older_than_months, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    cutoff = add_months(month_start(datetime.datetime.utcnow()), -older_than_months)
+    run_id = datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    table = Booking.__table__
+    columns = [column.name for column in table.columns]
+
+    with engine.connect() as connection:
+        partitions = list_booking_partitions(connection)
+
+    for start, name in partitions:
+        end = add_months(start, 1)
+        if end > cutoff:
+            continue
+
+        in_partition = [Booking.created_at >= start, Booking.created_at < end]
+        closed = in_partition + [Booking.status.in_(CLOSED_STATUSES)]
+        path = os.path.join(output_dir, f'{name}-{run_id}.csv.gz')
+        temporary_path = f'{path}.tmp'
+
+        try:
+            with engine.begin() as connection:
+                # Archive exactly the rows this transaction deletes
+                rows = connection.execute(delete(table).where(*closed).returning(*table.columns))
+                archived = 0
+                with open(temporary_path, 'wb') as raw_file:
+                    with gzip.open(raw_file, 'wt', newline='') as archive:
+                        writer = csv.writer(archive)
+                        writer.writerow(columns)
+                        for row in rows:
+                            writer.writerow([
+                                value.name if isinstance(value, BookingStatus) else value
+                                for value in row
+                            ])
+                            archived += 1
+                    raw_file.flush()
+                    os.fsync(raw_file.fileno())
+        except Exception:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        if archived:
+            os.replace(temporary_path, path)
+        else:
+            os.remove(temporary_path)
+
+        with engine.begin() as connection:
+            remaining = connection.execute(select(func.count()).select_from(Booking.__table__).where(*in_partition)).scalar()
+            if remaining == 0:
+                connection.execute(text(f"ALTER TABLE bookings DETACH PARTITION {name}"))
+                connection.execute(text(f"DROP TABLE {name}"))
+
+        print(f"{name}: archived {archived} closed bookings, {remaining} open bookings kept.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Database maintenance.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = commands.add_parser('migrate', help='bring an existing database up to the current models')
+    migrate_parser.add_argument('--months-ahead', type=int, default=3)
+
+    create_parser = commands.add_parser('create-partitions', help='create upcoming monthly partitions')
+    create_parser.add_argument('--months-ahead', type=int, default=3)
+
+    archive_parser = commands.add_parser('archive', help='archive closed bookings of old partitions')
+    archive_parser.add_argument('--older-than-months', type=int, default=12)
+    archive_parser.add_argument('--output-dir', default='archive')
+
+    args = parser.parse_args()
+    if args.command != 'migrate' and engine.dialect.name != 'postgresql':
+        parser.error('Booking partitions are only available on PostgreSQL.')
+
+    if args.command == 'migrate':
+        migrate(args.months_ahead)
+    elif args.command == 'create-partitions':
+        create_partitions(args.months_ahead)
+    else:
+        archive_bookings(args.older_than_months, args.output_dir)
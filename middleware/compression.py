@@ -0,0 +1,47 @@
+import os
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))
+
+def compress_response(response):
+
+    if request.method.lower() == 'head':
+        return response
+
+    if response.direct_passthrough or response.status_code < 200 or response.status_code in (204, 304):
+        return response
+
+    if 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    # Small payloads are not worth the CPU spent compressing them
+    if response.content_length is not None and response.content_length < COMPRESSION_MIN_SIZE:
+        return response
+
+    available = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(available)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=min(COMPRESSION_LEVEL, 11))
+    else:
+        compressed = gzip.compress(data, compresslevel=min(COMPRESSION_LEVEL, 9))
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,196 @@
+import os
+import math
+import time
+import threading
+from flask import request, jsonify
+
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_CAPACITY = float(os.getenv('RATE_LIMIT_CAPACITY', '60'))
+RATE_LIMIT_REFILL_RATE = float(os.getenv('RATE_LIMIT_REFILL_RATE', '1'))
+RATE_LIMIT_MAX_CONCURRENT = int(os.getenv('RATE_LIMIT_MAX_CONCURRENT', '4'))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# A crashed worker cannot release its slots; Redis forgets them after this long
+RATE_LIMIT_SLOT_TTL = int(os.getenv('RATE_LIMIT_SLOT_TTL', '60'))
+
+# Routes that hash passwords or dump whole tables cost more tokens
+ROUTE_COSTS = {
+    'auth_routes.signin': 10,
+    'auth_routes.signup': 10,
+    'services_routes.get_services': 5,
+    'bookings_routes.get_all_bookings': 5,
+    'users_routes.get_users': 5,
+}
+DEFAULT_COST = 1
+
+
+class MemoryBucketStore:
+    # Token buckets and in-flight counts kept in this process only
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.buckets = {}
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, cost):
+        now = time.monotonic()
+        with self.lock:
+            if len(self.buckets) > 10000:
+                self.prune(now)
+            tokens, updated_at = self.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_rate)
+            if tokens >= cost:
+                self.buckets[key] = (tokens - cost, now)
+                return 0
+            self.buckets[key] = (tokens, now)
+            return (cost - tokens) / self.refill_rate
+
+    def acquire(self, key, limit):
+        with self.lock:
+            if self.in_flight.get(key, 0) >= limit:
+                return False
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+            return True
+
+    def release(self, key):
+        with self.lock:
+            remaining = self.in_flight.get(key, 0) - 1
+            if remaining > 0:
+                self.in_flight[key] = remaining
+            else:
+                self.in_flight.pop(key, None)
+
+    def prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        self.buckets = {
+            key: (tokens, updated_at) for key, (tokens, updated_at) in self.buckets.items()
+            if tokens + (now - updated_at) * self.refill_rate < self.capacity
+        }
+
+
+class RedisBucketStore:
+    # Token buckets and in-flight counts shared by every worker through Redis
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local refill_rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated_at) * refill_rate)
+    local wait = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        wait = (cost - tokens) / refill_rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_rate) + 1)
+    return tostring(wait)
+    """
+
+    ACQUIRE_SCRIPT = """
+    local in_flight = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if in_flight >= tonumber(ARGV[1]) then
+        return 0
+    end
+    redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+    return 1
+    """
+
+    RELEASE_SCRIPT = """
+    if tonumber(redis.call('DECR', KEYS[1])) <= 0 then
+        redis.call('DEL', KEYS[1])
+    end
+    """
+
+    def __init__(self, capacity, refill_rate, url):
+        import redis
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.redis_error = redis.RedisError
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.acquire_script = self.client.register_script(self.ACQUIRE_SCRIPT)
+        self.release_script = self.client.register_script(self.RELEASE_SCRIPT)
+
+    # While Redis is unreachable requests are let through rather than failed;
+    # the limiter must not take the API down with it
+
+    def take(self, key, cost):
+        try:
+            wait = self.script(
+                keys=[f'rate_limit:{key}'],
+                args=[self.capacity, self.refill_rate, cost, time.time()]
+            )
+        except self.redis_error as e:
+            print(f"Rate limiting skipped, Redis unavailable: {e}")
+            return 0
+        return float(wait)
+
+    def acquire(self, key, limit):
+        try:
+            return bool(self.acquire_script(keys=[f'in_flight:{key}'], args=[limit, RATE_LIMIT_SLOT_TTL]))
+        except self.redis_error as e:
+            print(f"Concurrency limit skipped, Redis unavailable: {e}")
+            return True
+
+    def release(self, key):
+        try:
+            self.release_script(keys=[f'in_flight:{key}'])
+        except self.redis_error as e:
+            # The slot expires after RATE_LIMIT_SLOT_TTL seconds
+            print(f"Could not release rate limit slot, Redis unavailable: {e}")
+
+
+def create_bucket_store():
+    if RATE_LIMIT_BACKEND == 'redis':
+        return RedisBucketStore(RATE_LIMIT_CAPACITY, RATE_LIMIT_REFILL_RATE, REDIS_URL)
+    return MemoryBucketStore(RATE_LIMIT_CAPACITY, RATE_LIMIT_REFILL_RATE)
+
+bucket_store = create_bucket_store()
+
+# Behind a load balancer remote_addr is the balancer itself; server.py applies
+# ProxyFix with TRUSTED_PROXY_HOPS so it is the client address again
+def client_key():
+    user = getattr(request, 'user', None)
+    if user and user.get('id') is not None:
+        return f"user:{user.get('id')}"
+    return f"ip:{request.remote_addr}"
+
+def too_many_requests(retry_after):
+    response = jsonify({'error': 'Too many requests. Please try again later.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def rate_limit():
+
+    if not RATE_LIMIT_ENABLED or request.method.lower() == 'options':
+        return
+
+    if request.blueprint == 'health_routes':
+        return
+
+    key = client_key()
+    cost = ROUTE_COSTS.get(request.endpoint, DEFAULT_COST)
+
+    retry_after = bucket_store.take(key, cost)
+    if retry_after > 0:
+        return too_many_requests(retry_after)
+
+    if RATE_LIMIT_MAX_CONCURRENT > 0:
+        if not bucket_store.acquire(key, RATE_LIMIT_MAX_CONCURRENT):
+            return too_many_requests(1)
+        request.rate_limit_key = key
+
+def release_request(exception=None):
+    key = getattr(request, 'rate_limit_key', None)
+    if key is not None:
+        bucket_store.release(key)
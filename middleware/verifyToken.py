@@ -11,7 +11,7 @@ def verify_token():
     if request.method.lower() == 'options':
         return Response()
     
-    if request.blueprint == 'auth_routes':
+    if request.blueprint in ('auth_routes', 'health_routes'):
         return
     token = request.headers.get('Authorization')
     if token:
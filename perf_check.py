@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import statistics
+
+# Budgets are about the queries themselves, not about throttling or logging
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+os.environ.setdefault('SQL_ECHO', 'false')
+os.environ.setdefault('JWT_SECRET', 'perf-check-secret-for-local-runs-only')
+
+import jwt
+import bcrypt
+from sqlalchemy import event, and_, or_
+
+from server import create_app
+from config.database import (
+    engine, SessionLocal, User, Service, Booking, Job, ServiceCategoryModel, UserRole, BookingStatus
+)
+from middleware.verifyToken import JWT_SECRET
+
+# Run against a seeded database (see seed.py). Each route has an upper bound on
+# the SQL statements it issues, an optional bound on its median latency in
+# milliseconds, and the tables it must never scan in full.
+# Full-table listings grow with the data set, so they only get a statement budget.
+def route_budgets(sample):
+    return [
+        ('GET /health/ready', 'GET', '/health/ready', None, 1, 50, ()),
+        ('GET /health', 'GET', '/health', None, 0, 50, ()),
+        ('GET /categories', 'GET', '/categories', None, 1, 50, ()),
+        ('GET /categories/<name>', 'GET', f"/categories/{sample['category_name']}", None, 0, 50, ()),
+        ('GET /categories/<id>', 'GET', f"/categories/{sample['category_id']}", None, 0, 50, ()),
+        ('GET /users/<id>', 'GET', f"/users/{sample['user_id']}", None, 1, 50, ('users',)),
+        ('GET /services/<id>', 'GET', f"/services/{sample['service_id']}", None, 1, 50, ('services',)),
+        ('GET /services/owner/<id>', 'GET', f"/services/owner/{sample['owner_id']}", None, 1, 200, ('services',)),
+        ('GET /services/category/<name>', 'GET', f"/services/category/{sample['category_name']}", None, 2, None, ()),
+        ('GET /services/nearby', 'GET', f"/services/nearby?lat={sample['latitude']}&lng={sample['longitude']}&radius=5", None, 2, 300, ('services',)),
+        ('GET /services/nearby?category=', 'GET', f"/services/nearby?lat={sample['latitude']}&lng={sample['longitude']}&radius=5&category={sample['category_name']}", None, 3, 300, ('services',)),
+        ('GET /services/<id>/availability', 'GET', f"/services/{sample['service_id']}/availability?from={sample['from']}&to={sample['to']}", None, 2, 100, ('services', 'bookings')),
+        ('GET /bookings/service/<id>', 'GET', f"/bookings/service/{sample['service_id']}", None, 1, 200, ('bookings',)),
+        ('GET /bookings/user/<id>', 'GET', f"/bookings/user/{sample['customer_id']}", None, 1, 200, ('bookings',)),
+        ('GET /services', 'GET', '/services', None, 1, None, ()),
+        ('GET /bookings', 'GET', '/bookings', None, 1, None, ()),
+        ('GET /users', 'GET', '/users', None, 1, None, ()),
+    ]
+
+# Write routes only touch the throwaway rows made by create_throwaway_rows.
+# Bodies, and paths given as functions, are called with the call number so
+# every call changes something.
+def write_budgets(throwaway):
+    slot_start = datetime.datetime(2100, 1, 1)
+
+    def booking_slot(call):
+        start_time = slot_start + datetime.timedelta(hours=call)
+        return {
+            'service_id': throwaway['service_id'],
+            'start_time': start_time.isoformat(),
+            'end_time': (start_time + datetime.timedelta(minutes=30)).isoformat(),
+        }
+
+    return [
+        # bcrypt dominates the sign-in time by design
+        ('POST /auth/sign-in', 'POST', '/auth/sign-in',
+         lambda call: {'email': throwaway['email'], 'password': THROWAWAY_PASSWORD}, 1, 1000, ('users',)),
+        ('POST /auth/sign-up', 'POST', '/auth/sign-up', lambda call: {
+            'username': f"{throwaway['marker']}-{call}",
+            'email': f"{throwaway['marker']}-{call}@example.com",
+            'password': THROWAWAY_PASSWORD,
+            'confirm_password': THROWAWAY_PASSWORD,
+            'phone': '0',
+        }, 4, 1000, ('users',)),
+        ('PUT /users/<id>', 'PUT', f"/users/{throwaway['user_id']}",
+         lambda call: {'phone': str(call)}, 2, 50, ('users',)),
+        ('POST /services', 'POST', '/services',
+         lambda call: {'title': f'perf-check service {call}', 'category_id': throwaway['category_id']}, 3, 50, ()),
+        ('POST /bookings', 'POST', '/bookings', booking_slot, 5, 100, ('services', 'bookings')),
+        ('PUT /bookings/<id>', 'PUT', f"/bookings/{throwaway['booking_id']}",
+         lambda call: {'status': 'ACCEPTED' if call % 2 else 'PENDING'}, 3, 50, ('bookings',)),
+        ('DELETE /bookings/<id>', 'DELETE', lambda call: f"/bookings/{throwaway['spare_booking_ids'][call]}",
+         None, 2, 50, ('bookings',)),
+        ('PUT /services/<id>', 'PUT', f"/services/{throwaway['service_id']}",
+         lambda call: {'title': f'perf-check service {call}'}, 3, 50, ('services',)),
+        ('DELETE /services/<id>', 'DELETE', f"/services/{throwaway['service_id']}", None, 3, 50, ('services',)),
+        ('DELETE /users/<id>', 'DELETE', f"/users/{throwaway['user_id']}", None, 3, 50, ('users',)),
+    ]
+
+def load_sample(session):
+    service = session.query(Service).filter(Service.latitude.isnot(None)).order_by(Service.id).first()
+    if service is None:
+        service = session.query(Service).order_by(Service.id).first()
+    if service is None:
+        sys.exit('No services found. Run seed.py first.')
+
+    customer_id = session.query(Booking.user_id).order_by(Booking.id).limit(1).scalar()
+    user = session.query(User).filter(User.id == service.owner_id).first()
+    category = session.query(ServiceCategoryModel).filter(ServiceCategoryModel.id == service.category_id).first()
+    today = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'user': user,
+        'user_id': user.id,
+        'owner_id': service.owner_id,
+        'customer_id': customer_id or user.id,
+        'service_id': service.id,
+        'category_id': category.id,
+        'category_name': category.name.value,
+        'latitude': service.latitude or 0,
+        'longitude': service.longitude or 0,
+        'from': today.isoformat(),
+        'to': (today + datetime.timedelta(days=7)).isoformat(),
+    }
+
+THROWAWAY_PASSWORD = 'perf-check-password'
+
+# calls is how many times each route is called, one spare booking per call
+def create_throwaway_rows(session, category_id, calls):
+    marker = f'perf-check-{int(time.time() * 1000)}'
+    user = User(
+        username=marker,
+        email=f'{marker}@example.com',
+        password=bcrypt.hashpw(THROWAWAY_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8'),
+        phone='0',
+        role=UserRole.PROVIDER
+    )
+    session.add(user)
+    session.flush()
+    service = Service(title=marker, owner_id=user.id, category_id=category_id)
+    session.add(service)
+    session.flush()
+    bookings = [
+        Booking(
+            service_id=service.id,
+            user_id=user.id,
+            status=BookingStatus.PENDING,
+            start_time=datetime.datetime(2099, 1, 1, 9) + datetime.timedelta(days=number),
+            end_time=datetime.datetime(2099, 1, 1, 10) + datetime.timedelta(days=number)
+        )
+        for number in range(calls + 1)
+    ]
+    session.add_all(bookings)
+    session.commit()
+    return {
+        'marker': marker,
+        'headers': auth_header(user),
+        'user_id': user.id,
+        'email': user.email,
+        'category_id': category_id,
+        'service_id': service.id,
+        'booking_id': bookings[0].id,
+        'spare_booking_ids': [booking.id for booking in bookings[1:]],
+    }
+
+# Remove the throwaway rows together with whatever the write routes added
+def delete_throwaway_rows(session, throwaway):
+    session.query(Job).filter(or_(
+        and_(Job.name == 'delete_service', Job.payload['service_id'].as_integer() == throwaway['service_id']),
+        and_(Job.name == 'delete_user', Job.payload['user_id'].as_integer() == throwaway['user_id'])
+    )).delete(synchronize_session=False)
+    service_ids = session.query(Service.id).filter(Service.owner_id == throwaway['user_id'])
+    session.query(Booking).filter(Booking.service_id.in_(service_ids)).delete(synchronize_session=False)
+    session.query(Service).filter(Service.owner_id == throwaway['user_id']).delete(synchronize_session=False)
+    session.query(User).filter(or_(
+        User.id == throwaway['user_id'],
+        User.username.like(f"{throwaway['marker']}-%")
+    )).delete(synchronize_session=False)
+    session.commit()
+
+def auth_header(user):
+    token = jwt.encode({
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'phone': user.phone,
+        'role': user.role.value
+    }, JWT_SECRET, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+# Scanning fewer pages than this costs about as much as an index probe, and
+# it is the planner's right choice for empty or near-empty partitions
+MIN_FULL_SCAN_PAGES = 8
+
+# Names of the tables a statement reads in full, according to the planner
+def full_scans(statement, parameters):
+    raw_connection = engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        tables = set()
+        if engine.dialect.name == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            nodes = [plan[0]['Plan']]
+            while nodes:
+                node = nodes.pop()
+                if node.get('Node Type') == 'Seq Scan':
+                    tables.add(node['Relation Name'])
+                nodes.extend(node.get('Plans', []))
+            if tables:
+                cursor.execute(
+                    'SELECT relname FROM pg_class WHERE relname = ANY(%(tables)s) AND relpages >= %(pages)s',
+                    {'tables': list(tables), 'pages': MIN_FULL_SCAN_PAGES}
+                )
+                tables = {row[0] for row in cursor.fetchall()}
+        elif engine.dialect.name == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            for row in cursor.fetchall():
+                detail = row[-1]
+                if detail.startswith('SCAN ') and ' USING ' not in detail:
+                    # Older SQLite versions print "SCAN TABLE <name>"
+                    words = [word for word in detail.split() if word != 'TABLE']
+                    tables.add(words[1])
+        return tables
+    finally:
+        raw_connection.close()
+
+def check(repeat, check_plans):
+    app = create_app()
+    client = app.test_client()
+
+    session = SessionLocal()
+    try:
+        sample = load_sample(session)
+        read_headers = auth_header(sample['user'])
+        throwaway = create_throwaway_rows(session, sample['category_id'], repeat + 1)
+    finally:
+        session.close()
+
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    failures = []
+    try:
+        routes = [(route, read_headers) for route in route_budgets(sample)]
+        routes += [(route, throwaway['headers']) for route in write_budgets(throwaway)]
+
+        event.listen(engine, 'before_cursor_execute', record_statement)
+        print(f"{'route':<36} {'status':>6} {'stmts':>7} {'median ms':>10}")
+        for (name, method, path, body, max_statements, max_ms, no_full_scan), headers in routes:
+            def call(number):
+                return client.open(path(number) if callable(path) else path, method=method, headers=headers,
+                                   json=body(number) if body else None)
+
+            # The first call warms caches and the connection pool
+            call(0)
+
+            timings = []
+            for number in range(1, repeat + 1):
+                statements.clear()
+                started = time.perf_counter()
+                response = call(number)
+                timings.append((time.perf_counter() - started) * 1000)
+            issued = list(statements)
+            median_ms = statistics.median(timings)
+
+            print(f"{name:<36} {response.status_code:>6} {len(issued):>3}/{max_statements:<3} {median_ms:>10.1f}")
+
+            if response.status_code >= 400:
+                failures.append(f"{name}: returned {response.status_code}")
+            if len(issued) > max_statements:
+                failures.append(f"{name}: {len(issued)} statements, budget {max_statements}")
+            if max_ms is not None and median_ms > max_ms:
+                failures.append(f"{name}: median {median_ms:.1f} ms, budget {max_ms} ms")
+            if check_plans and no_full_scan:
+                for statement, parameters in issued:
+                    if not statement.lstrip().upper().startswith('SELECT'):
+                        continue
+                    scanned = {
+                        table for table in full_scans(statement, parameters)
+                        if any(table == watched or table.startswith(f'{watched}_') for watched in no_full_scan)
+                    }
+                    if scanned:
+                        failures.append(f"{name}: full scan of {', '.join(sorted(scanned))}")
+    finally:
+        if event.contains(engine, 'before_cursor_execute', record_statement):
+            event.remove(engine, 'before_cursor_execute', record_statement)
+        session = SessionLocal()
+        try:
+            delete_throwaway_rows(session, throwaway)
+        finally:
+            session.close()
+
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check per-route statement and latency budgets.')
+    parser.add_argument('--repeat', type=int, default=5, help='timed calls per route')
+    parser.add_argument('--check-plans', action='store_true',
+                        help='fail when the planner scans a whole table a route must reach through an index')
+    args = parser.parse_args()
+
+    failures = check(args.repeat, args.check_plans)
+    if failures:
+        print('\nBudget violations:')
+        for failure in failures:
+            print(f'  {failure}')
+        sys.exit(1)
+    print('\nAll routes within budget.')
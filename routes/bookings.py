@@ -1,10 +1,40 @@
 from flask import Blueprint, request, jsonify
 from config.database import Booking, Service, SessionLocal, BookingStatus
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 import datetime
+from utils.payload import object_response, listing_response
+from config.partitions import month_start, add_months
+from utils.timeranges import parse_timestamp, active_bookings_between, ACTIVE_STATUSES
+import os
 
 bookings_routes = Blueprint('bookings_routes', __name__)
 
+# Listings leave out closed bookings older than a few months unless
+# ?include_history=true is passed; pending and accepted ones are always listed
+BOOKINGS_LIVE_MONTHS = int(os.getenv('BOOKINGS_LIVE_MONTHS', '6'))
+
+def listed_bookings(session):
+    query = session.query(Booking)
+    if request.args.get('include_history', 'false').lower() != 'true':
+        cutoff = add_months(month_start(datetime.datetime.utcnow()), -BOOKINGS_LIVE_MONTHS)
+        query = query.filter(or_(Booking.status.in_(ACTIVE_STATUSES), Booking.created_at >= cutoff))
+    return query
+
+# Keys of serialize_booking, in order
+BOOKING_FIELDS = ('id', 'service_id', 'user_id', 'status', 'start_time', 'end_time', 'created_at')
+
+def serialize_booking(booking):
+    return {
+        'id': booking.id,
+        'service_id': booking.service_id,
+        'user_id': booking.user_id,
+        'status': booking.status.name,
+        'start_time': booking.start_time.isoformat() if booking.start_time else None,
+        'end_time': booking.end_time.isoformat() if booking.end_time else None,
+        'created_at': booking.created_at.isoformat()
+    }
+
 # Create a new booking
 @bookings_routes.route('/bookings', methods=['POST'])
 def create_booking():
@@ -16,29 +46,41 @@ def create_booking():
         if not service_id:
             return jsonify({'error': 'Service ID is required.'}), 400
 
-        service = session.query(Service).filter(Service.id == service_id).first()
+        try:
+            start_time = parse_timestamp(booking_data.get('start_time'))
+            end_time = parse_timestamp(booking_data.get('end_time'))
+        except ValueError:
+            return jsonify({'error': 'Invalid start_time or end_time.'}), 400
+
+        if not all([start_time, end_time]):
+            return jsonify({'error': 'Start time and end time are required.'}), 400
+
+        if start_time >= end_time:
+            return jsonify({'error': 'Start time must be before end time.'}), 400
+
+        # Locking the service row serializes bookings of the same service
+        service = session.query(Service).filter(Service.id == service_id).with_for_update().first()
         if not service:
             return jsonify({'error': 'Service not found.'}), 404
 
+        if active_bookings_between(session, service_id, start_time, end_time).first():
+            return jsonify({'error': 'The service is already booked for this time.'}), 409
+
         user_id = request.user.get('id') 
 
         # Create the booking
         new_booking = Booking(
             service_id=service_id,
             user_id=user_id,
-            status=BookingStatus.PENDING
+            status=BookingStatus.PENDING,
+            start_time=start_time,
+            end_time=end_time
         )
         session.add(new_booking)
         session.commit()
         session.refresh(new_booking)
 
-        return jsonify({
-            'id': new_booking.id,
-            'service_id': new_booking.service_id,
-            'user_id': new_booking.user_id,
-            'status': new_booking.status.name,
-            'created_at': new_booking.created_at.isoformat()
-        }), 201
+        return object_response(serialize_booking(new_booking)), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -59,17 +101,21 @@ def update_booking(booking_id):
         if not booking:
             return jsonify({'error': 'Booking not found.'}), 404
 
+        # Reopening a booking must not collide with bookings made since
+        reopening = BookingStatus[new_status] in ACTIVE_STATUSES and booking.status not in ACTIVE_STATUSES
+        if reopening and booking.start_time and booking.end_time:
+            session.query(Service).filter(Service.id == booking.service_id).with_for_update().first()
+            conflict = active_bookings_between(
+                session, booking.service_id, booking.start_time, booking.end_time
+            ).filter(Booking.id != booking.id).first()
+            if conflict:
+                return jsonify({'error': 'The service is already booked for this time.'}), 409
+
         booking.status = BookingStatus[new_status]
         session.commit()
         session.refresh(booking)
 
-        return jsonify({
-            'id': booking.id,
-            'service_id': booking.service_id,
-            'user_id': booking.user_id,
-            'status': booking.status.name,
-            'created_at': booking.created_at.isoformat()
-        }), 200
+        return object_response(serialize_booking(booking)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -98,16 +144,8 @@ def delete_booking(booking_id):
 def get_all_bookings():
     session = SessionLocal()
     try:
-        bookings = session.query(Booking).all()
-        return jsonify([
-            {
-                'id': booking.id,
-                'service_id': booking.service_id,
-                'user_id': booking.user_id,
-                'status': booking.status.name,
-                'created_at': booking.created_at.isoformat()
-            } for booking in bookings
-        ]), 200
+        bookings = listed_bookings(session).all()
+        return listing_response([serialize_booking(booking) for booking in bookings], BOOKING_FIELDS), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -118,16 +156,8 @@ def get_all_bookings():
 def get_bookings_by_user(user_id):
     session = SessionLocal()
     try:
-        bookings = session.query(Booking).filter(Booking.user_id == user_id).all()
-        return jsonify([
-            {
-                'id': booking.id,
-                'service_id': booking.service_id,
-                'user_id': booking.user_id,
-                'status': booking.status.name,
-                'created_at': booking.created_at.isoformat()
-            } for booking in bookings
-        ]), 200
+        bookings = listed_bookings(session).filter(Booking.user_id == user_id).all()
+        return listing_response([serialize_booking(booking) for booking in bookings], BOOKING_FIELDS), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -138,16 +168,8 @@ def get_bookings_by_user(user_id):
 def get_bookings_by_service(service_id):
     session = SessionLocal()
     try:
-        bookings = session.query(Booking).filter(Booking.service_id == service_id).all()
-        return jsonify([
-            {
-                'id': booking.id,
-                'service_id': booking.service_id,
-                'user_id': booking.user_id,
-                'status': booking.status.name,
-                'created_at': booking.created_at.isoformat()
-            } for booking in bookings
-        ]), 200
+        bookings = listed_bookings(session).filter(Booking.service_id == service_id).all()
+        return listing_response([serialize_booking(booking) for booking in bookings], BOOKING_FIELDS), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -4,18 +4,34 @@ from config.database import SessionLocal, ServiceCategoryModel  # Ensure you imp
 
 categories_routes = Blueprint('categories_routes', __name__)
 
-# Get all categories
-@categories_routes.route('/categories', methods=['GET'])
-def get_categories():
-    session = SessionLocal()
-    try:
+# Categories are seeded from ServiceCategoryEnum and never change at runtime
+categories_cache = None
+
+def load_categories(session):
+    global categories_cache
+    if categories_cache is None:
         categories = session.query(ServiceCategoryModel).all()  # Use ServiceCategoryModel here
-        return jsonify([
+        categories_cache = [
             {
                 'id': category.id,
                 'name': category.name,
             } for category in categories
-        ]), 200
+        ]
+    return categories_cache
+
+def warm_category_cache():
+    session = SessionLocal()
+    try:
+        load_categories(session)
+    finally:
+        session.close()
+
+# Get all categories
+@categories_routes.route('/categories', methods=['GET'])
+def get_categories():
+    session = SessionLocal()
+    try:
+        return jsonify(load_categories(session)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -26,12 +42,10 @@ def get_categories():
 def get_category(category_name):
     session = SessionLocal()
     try:
-        category = session.query(ServiceCategoryModel).filter(ServiceCategoryModel.name == category_name).first()
-        if category:
-            return jsonify({
-                'id': category.id,
-                'name': category.name,
-            }), 200
+        for category in load_categories(session):
+            # Accept the enum value ("plumbing") and member name ("PLUMBING"), as the database lookup did
+            if category_name in (category['name'].value, category['name'].name):
+                return jsonify(category), 200
         return jsonify({'error': 'Category not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -43,14 +57,11 @@ def get_category(category_name):
 def get_category_by_id(category_id):
     session = SessionLocal()
     try:
-        category = session.query(ServiceCategoryModel).filter(ServiceCategoryModel.id == category_id).first()
-        if category:
-            return jsonify({
-                'id': category.id,
-                'name': category.name,
-            }), 200
+        for category in load_categories(session):
+            if category['id'] == category_id:
+                return jsonify(category), 200
         return jsonify({'error': 'Category not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
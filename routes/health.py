@@ -0,0 +1,22 @@
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+from config.database import SessionLocal
+
+health_routes = Blueprint('health_routes', __name__)
+
+# Liveness: the process is up and serving requests
+@health_routes.route('/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok'}), 200
+
+# Readiness: the database is reachable
+@health_routes.route('/health/ready', methods=['GET'])
+def ready():
+    session = SessionLocal()
+    try:
+        session.execute(text('SELECT 1'))
+        return jsonify({'status': 'ready'}), 200
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+    finally:
+        session.close()
@@ -1,9 +1,55 @@
 from flask import Blueprint, request, jsonify
-from config.database import Service, SessionLocal, ServiceCategoryModel
+from config.database import Service, Booking, SessionLocal, ServiceCategoryModel
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
+from utils.payload import object_response, listing_response, requested_fields, select_fields
+from utils.geo import encode_geohash, next_geohash_prefix, haversine_km, bounding_box, covering_geohash_prefixes
+from jobs.queue import enqueue
+from utils.timeranges import parse_timestamp, active_bookings_between, free_intervals, split_slots
+import datetime
+import heapq
 
 services_routes = Blueprint('services_routes', __name__)
 
+MAX_AVAILABILITY_DAYS = 31
+DEFAULT_NEARBY_RADIUS_KM = 10
+MAX_NEARBY_RADIUS_KM = 100
+DEFAULT_NEARBY_LIMIT = 20
+MAX_NEARBY_LIMIT = 100
+
+# Keys of serialize_service, in order
+SERVICE_FIELDS = ('id', 'title', 'description', 'category_id', 'owner_id', 'latitude', 'longitude', 'created_at')
+
+def serialize_service(service):
+    return {
+        'id': service.id,
+        'title': service.title,
+        'description': service.description,
+        'category_id': service.category_id,
+        'owner_id': service.owner_id,
+        'latitude': service.latitude,
+        'longitude': service.longitude,
+        'created_at': service.created_at.isoformat()
+    }
+
+# Read an optional latitude/longitude pair; both or neither must be given
+def parse_location(data):
+    latitude = data.get('latitude')
+    longitude = data.get('longitude')
+    if latitude is None and longitude is None:
+        return None, None
+    if latitude is None or longitude is None:
+        raise ValueError
+    latitude, longitude = float(latitude), float(longitude)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError
+    return latitude, longitude
+
+def set_location(service, latitude, longitude):
+    service.latitude = latitude
+    service.longitude = longitude
+    service.geohash = encode_geohash(latitude, longitude) if latitude is not None else None
+
 # Create a new service
 @services_routes.route('/services', methods=['POST'])
 def create_service():
@@ -17,6 +63,11 @@ def create_service():
         if not all([title, category_id]):
             return jsonify({'error': 'Incomplete data. Title and category_id are required.'}), 400
 
+        try:
+            latitude, longitude = parse_location(new_service_data)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid latitude or longitude.'}), 400
+
         owner_id = request.user.get('id')  
 
         category = session.query(ServiceCategoryModel).filter(ServiceCategoryModel.id == category_id).first()
@@ -32,19 +83,13 @@ def create_service():
             category_id=category_id,
             owner_id=owner_id  
         )
+        set_location(new_service, latitude, longitude)
 
         session.add(new_service)
         session.commit()
         session.refresh(new_service)
 
-        return jsonify({
-            'id': new_service.id,
-            'title': new_service.title,
-            'description': new_service.description,
-            'category_id': new_service.category_id,
-            'owner_id': new_service.owner_id,
-            'created_at': new_service.created_at.isoformat()
-        }), 201
+        return object_response(serialize_service(new_service)), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -61,6 +106,12 @@ def update_service(service_id):
         description = updated_service_data.get('description')
         category_id = updated_service_data.get('category_id')
 
+        location_given = 'latitude' in updated_service_data or 'longitude' in updated_service_data
+        try:
+            latitude, longitude = parse_location(updated_service_data)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid latitude or longitude.'}), 400
+
         service = session.query(Service).filter(Service.id == service_id).first()
         if not service:
             return jsonify({'error': 'Service not found.'}), 404
@@ -79,18 +130,13 @@ def update_service(service_id):
             service.description = description
         if category_id is not None:
             service.category_id = category_id
+        if location_given:
+            set_location(service, latitude, longitude)
 
         session.commit()
         session.refresh(service)
 
-        return jsonify({
-            'id': service.id,
-            'title': service.title,
-            'description': service.description,
-            'category_id': service.category_id,
-            'owner_id': service.owner_id,
-            'created_at': service.created_at.isoformat()
-        }), 200
+        return object_response(serialize_service(service)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -110,10 +156,11 @@ def delete_service(service_id):
         if service.owner_id != current_user_id:
             return jsonify({'error': 'You are not authorized to delete this service.'}), 403
 
-        session.delete(service)
+        # The cascade over reviews and bookings runs in the job worker
+        deletion_job = enqueue(session, 'delete_service', service_id=service_id)
         session.commit()
 
-        return jsonify({'message': 'Service deleted successfully.'}), 200
+        return jsonify({'message': 'Service deletion scheduled.', 'job_id': deletion_job.id}), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -125,16 +172,96 @@ def get_services():
     session = SessionLocal()
     try:
         services = session.query(Service).all()
-        return jsonify([
-            {
-                'id': service.id,
-                'title': service.title,
-                'description': service.description,
-                'category_id': service.category_id,
-                'owner_id': service.owner_id,
-                'created_at': service.created_at.isoformat()
-            } for service in services
-        ]), 200
+        return listing_response([serialize_service(service) for service in services], SERVICE_FIELDS), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+# Get services within ?radius= km of ?lat=,?lng=, nearest first.
+# Candidates come from the indexed geohash cells covering the radius, so the
+# work is bounded by the area searched. Pages continue from ?cursor=.
+@services_routes.route('/services/nearby', methods=['GET'])
+def get_services_nearby():
+    session = SessionLocal()
+    try:
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lng', type=float)
+        radius = request.args.get('radius', DEFAULT_NEARBY_RADIUS_KM, type=float)
+        limit = request.args.get('limit', DEFAULT_NEARBY_LIMIT, type=int)
+        category_name = request.args.get('category')
+        cursor = request.args.get('cursor')
+
+        if latitude is None or longitude is None:
+            return jsonify({'error': 'Both lat and lng are required.'}), 400
+
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return jsonify({'error': 'Invalid lat or lng.'}), 400
+
+        if not 0 < radius <= MAX_NEARBY_RADIUS_KM:
+            return jsonify({'error': f'radius must be between 0 and {MAX_NEARBY_RADIUS_KM} km.'}), 400
+
+        limit = max(1, min(limit, MAX_NEARBY_LIMIT))
+
+        after = None
+        if cursor:
+            try:
+                after_distance, after_id = cursor.split(':')
+                after = (float(after_distance), int(after_id))
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor.'}), 400
+
+        min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius)
+        # Only the coordinates are read for every candidate; whole rows are
+        # loaded for the page alone
+        query = session.query(Service.id, Service.latitude, Service.longitude).filter(
+            Service.latitude.between(min_lat, max_lat),
+            Service.longitude.between(min_lng, max_lng)
+        )
+
+        prefixes = covering_geohash_prefixes(min_lat, min_lng, max_lat, max_lng)
+        if prefixes:
+            cells = []
+            for prefix in prefixes:
+                upper = next_geohash_prefix(prefix)
+                if upper is None:
+                    cells.append(Service.geohash >= prefix)
+                else:
+                    cells.append(and_(Service.geohash >= prefix, Service.geohash < upper))
+            query = query.filter(or_(*cells))
+
+        if category_name:
+            category = session.query(ServiceCategoryModel).filter(ServiceCategoryModel.name == category_name).first()
+            if not category:
+                return jsonify({'error': 'Category not found.'}), 404
+            query = query.filter(Service.category_id == category.id)
+
+        nearby = []
+        for service_id, service_latitude, service_longitude in query:
+            distance = haversine_km(latitude, longitude, service_latitude, service_longitude)
+            if distance <= radius and (after is None or (distance, service_id) > after):
+                nearby.append((distance, service_id))
+        nearby = heapq.nsmallest(limit + 1, nearby)
+
+        page = nearby[:limit]
+        next_cursor = None
+        if len(nearby) > limit:
+            last_distance, last_id = page[-1]
+            next_cursor = f'{last_distance!r}:{last_id}'
+
+        services = {}
+        if page:
+            ids = [service_id for _, service_id in page]
+            services = {service.id: service for service in session.query(Service).filter(Service.id.in_(ids))}
+
+        fields = requested_fields()
+        return jsonify({
+            'services': [
+                select_fields(dict(serialize_service(services[service_id]), distance_km=distance), fields)
+                for distance, service_id in page if service_id in services
+            ],
+            'next_cursor': next_cursor
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -147,14 +274,7 @@ def get_service(service_id):
     try:
         service = session.query(Service).filter(Service.id == service_id).first()
         if service:
-            return jsonify({
-                'id': service.id,
-                'title': service.title,
-                'description': service.description,
-                'category_id': service.category_id,
-                'owner_id': service.owner_id,
-                'created_at': service.created_at.isoformat()
-            }), 200
+            return object_response(serialize_service(service)), 200
         return jsonify({'error': 'Service not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -171,16 +291,7 @@ def get_services_by_category(category_name):
             return jsonify({'error': 'Category not found.'}), 404
 
         services = session.query(Service).filter(Service.category_id == category.id).all()
-        return jsonify([
-            {
-                'id': service.id,
-                'title': service.title,
-                'description': service.description,
-                'category_id': service.category_id,
-                'owner_id': service.owner_id,
-                'created_at': service.created_at.isoformat()
-            } for service in services
-        ]), 200
+        return listing_response([serialize_service(service) for service in services], SERVICE_FIELDS), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -191,16 +302,64 @@ def get_services_by_owner(owner_id):
     session = SessionLocal()
     try:
         services = session.query(Service).filter(Service.owner_id == owner_id).all()
-        return jsonify([
-            {
-                'id': service.id,
-                'title': service.title,
-                'description': service.description,
-                'category_id': service.category_id,
-                'owner_id': service.owner_id,
-                'created_at': service.created_at.isoformat()
-            } for service in services
-        ]), 200
+        return listing_response([serialize_service(service) for service in services], SERVICE_FIELDS), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+# Get the free time of a service between ?from= and ?to=.
+# ?slot_minutes= cuts the free time into bookable slots of that length.
+@services_routes.route('/services/<int:service_id>/availability', methods=['GET'])
+def get_service_availability(service_id):
+    session = SessionLocal()
+    try:
+        try:
+            start = parse_timestamp(request.args.get('from'))
+            end = parse_timestamp(request.args.get('to'))
+        except ValueError:
+            return jsonify({'error': 'Invalid from or to timestamp.'}), 400
+
+        slot_minutes = request.args.get('slot_minutes')
+        if slot_minutes is not None:
+            try:
+                slot_minutes = int(slot_minutes)
+            except ValueError:
+                return jsonify({'error': 'slot_minutes must be an integer.'}), 400
+
+        if not all([start, end]):
+            return jsonify({'error': 'Both from and to are required.'}), 400
+
+        if start >= end:
+            return jsonify({'error': 'from must be before to.'}), 400
+
+        if end - start > datetime.timedelta(days=MAX_AVAILABILITY_DAYS):
+            return jsonify({'error': f'The range cannot exceed {MAX_AVAILABILITY_DAYS} days.'}), 400
+
+        if slot_minutes is not None and slot_minutes <= 0:
+            return jsonify({'error': 'slot_minutes must be positive.'}), 400
+
+        service = session.query(Service).filter(Service.id == service_id).first()
+        if not service:
+            return jsonify({'error': 'Service not found.'}), 404
+
+        booked = active_bookings_between(session, service_id, start, end).with_entities(
+            Booking.start_time, Booking.end_time
+        ).all()
+
+        intervals = free_intervals(start, end, booked)
+        if slot_minutes:
+            intervals = split_slots(intervals, datetime.timedelta(minutes=slot_minutes))
+
+        return jsonify({
+            'service_id': service_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'free': [
+                {'start': interval_start.isoformat(), 'end': interval_end.isoformat()}
+                for interval_start, interval_end in intervals
+            ]
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -1,25 +1,31 @@
 import os 
 from flask import Blueprint, request, jsonify
-from config.database import User, SessionLocal , UserRole , Service
+from config.database import User, SessionLocal
+from utils.payload import object_response, listing_response
+from jobs.queue import enqueue
 
 users_routes = Blueprint('users_routes', __name__)
 
+# Keys of serialize_user, in order
+USER_FIELDS = ('id', 'username', 'email', 'phone', 'role', 'created_at')
+
+def serialize_user(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'phone': user.phone,
+        'role': user.role.value,
+        'created_at': user.created_at.isoformat()
+    }
+
 # Get all users
 @users_routes.route('/users', methods=['GET'])
 def get_users():
     session = SessionLocal()
     try:
         users = session.query(User).all()
-        return jsonify([
-            {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'phone': user.phone,
-                'role': user.role.value,
-                'created_at': user.created_at.isoformat()
-            } for user in users
-        ]), 200
+        return listing_response([serialize_user(user) for user in users], USER_FIELDS), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
@@ -33,14 +39,7 @@ def get_user(user_id):
 
         user = session.query(User).filter(User.id == user_id).first()  
         if user:
-            return jsonify({
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'phone': user.phone,
-                'role': user.role.value,
-                'created_at': user.created_at.isoformat()
-            }), 200
+            return object_response(serialize_user(user)), 200
         return jsonify({'error': 'User not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -79,14 +78,7 @@ def update_user(user_id):
         # Retrieve the updated user
         user = session.query(User).filter(User.id == user_id).first()
 
-        return jsonify({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'phone': user.phone,
-            'role': user.role.value,
-            'created_at': user.created_at.isoformat()
-        }), 200
+        return object_response(serialize_user(user)), 200
 
     except Exception as e:
         session.rollback()
@@ -103,18 +95,11 @@ def delete_user(user_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        services = session.query(Service).filter_by(owner_id=user_id).all()
-        for service in services:
-            session.delete(service)
-
-        user_roles = session.query(UserRole).filter_by(user_id=user_id).all()
-        for role in user_roles:
-            session.delete(role)
-
-        session.delete(user)
+        # The cascade over services, reviews and bookings runs in the job worker
+        deletion_job = enqueue(session, 'delete_user', user_id=user_id)
         session.commit()
 
-        return jsonify({'message': 'User deleted successfully'}), 200
+        return jsonify({'message': 'User deletion scheduled', 'job_id': deletion_job.id}), 202
     except Exception as e:
         session.rollback()
         return jsonify({'error': str(e)}), 400
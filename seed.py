@@ -0,0 +1,204 @@
+import io
+import csv
+import enum
+import random
+import argparse
+import datetime
+import bcrypt
+from sqlalchemy import select, func, text
+
+from config.database import (
+    engine, User, Service, Booking, Review, ServiceCategoryModel,
+    UserRole, ServiceStatus, BookingStatus, ReviewRating
+)
+from config.partitions import month_start, add_months, create_booking_partition
+from utils.geo import encode_geohash
+
+# Cities the generated services are scattered around: (latitude, longitude)
+CITIES = [
+    (26.2285, 50.5860),
+    (25.2854, 51.5310),
+    (24.7136, 46.6753),
+    (21.4858, 39.1925),
+    (25.2048, 55.2708),
+    (29.3759, 47.9774),
+    (23.5880, 58.3829),
+]
+TITLE_WORDS = ['Quick', 'Reliable', 'Affordable', 'Expert', 'Same-day', 'Professional', 'Friendly', 'Certified']
+DESCRIPTION_WORDS = ['fast', 'clean', 'insured', 'experienced', 'available', 'weekends', 'tools', 'included',
+                     'licensed', 'guaranteed', 'careful', 'on', 'time', 'local', 'team', 'quality']
+
+
+def next_id(connection, model):
+    return connection.execute(select(func.coalesce(func.max(model.id), 0))).scalar() + 1
+
+# Bulk-load rows: COPY on PostgreSQL, executemany everywhere else
+def load_rows(connection, table, columns, rows):
+    if not rows:
+        return
+    if connection.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                '' if value is None else value.name if isinstance(value, enum.Enum) else value
+                for value in row
+            ])
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        copy_sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        if hasattr(cursor, 'copy_expert'):
+            # psycopg2
+            cursor.copy_expert(copy_sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+    else:
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+def load_in_batches(connection, table, columns, generate, count, batch_size):
+    batch = []
+    for row in generate(count):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            load_rows(connection, table, columns, batch)
+            batch = []
+    load_rows(connection, table, columns, batch)
+    print(f"Loaded {count} rows into {table.name}.")
+
+# Keep the serial sequences ahead of the explicitly assigned ids
+def reset_sequences(connection):
+    if connection.dialect.name != 'postgresql':
+        return
+    for table in ['users', 'services', 'bookings', 'reviews']:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+def random_datetime(rng, start, end):
+    return start + datetime.timedelta(seconds=rng.randint(0, int((end - start).total_seconds())))
+
+def seed(users, services, bookings, reviews, months, batch_size, seed_value):
+    rng = random.Random(seed_value)
+    now = datetime.datetime.utcnow()
+    history_start = add_months(month_start(now), -months)
+    # Hashing a password per user would dominate the run; they all share one
+    password = bcrypt.hashpw(b'password', bcrypt.gensalt()).decode('utf-8')
+
+    with engine.begin() as connection:
+        category_ids = [row[0] for row in connection.execute(select(ServiceCategoryModel.id))]
+
+        if connection.dialect.name == 'postgresql':
+            for offset in range(months + 1):
+                create_booking_partition(connection, add_months(history_start, offset))
+
+        first_user = next_id(connection, User)
+        first_service = next_id(connection, Service)
+        first_booking = next_id(connection, Booking)
+        first_review = next_id(connection, Review)
+
+        # A third of the users are providers; they own every service
+        providers = max(1, users // 3)
+        provider_ids = range(first_user, first_user + providers)
+        customer_ids = range(first_user + providers, first_user + users) if users > providers else provider_ids
+        service_ids = range(first_service, first_service + services)
+
+        def generate_users(count):
+            for offset in range(count):
+                user_id = first_user + offset
+                yield (
+                    user_id,
+                    f'user{user_id}',
+                    f'user{user_id}@example.com',
+                    password,
+                    f'+973{rng.randint(30000000, 39999999)}',
+                    UserRole.PROVIDER if offset < providers else UserRole.CUSTOMER,
+                    random_datetime(rng, history_start, now),
+                )
+
+        def generate_services(count):
+            for offset in range(count):
+                city_lat, city_lng = rng.choice(CITIES)
+                latitude = city_lat + rng.uniform(-0.2, 0.2)
+                longitude = city_lng + rng.uniform(-0.2, 0.2)
+                yield (
+                    first_service + offset,
+                    f'{rng.choice(TITLE_WORDS)} service {first_service + offset}',
+                    ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(10, 60))),
+                    rng.choice(provider_ids),
+                    rng.choice(category_ids),
+                    random_datetime(rng, history_start, now),
+                    rng.choice(list(ServiceStatus)),
+                    latitude,
+                    longitude,
+                    encode_geohash(latitude, longitude),
+                )
+
+        # Each service's bookings get consecutive, non-overlapping slots
+        next_slot = {}
+
+        def generate_bookings(count):
+            for offset in range(count):
+                service_id = rng.choice(service_ids)
+                created_at = random_datetime(rng, history_start, now)
+                start_time = max(next_slot.get(service_id, history_start), created_at) + datetime.timedelta(hours=rng.randint(1, 72))
+                end_time = start_time + datetime.timedelta(hours=rng.randint(1, 4))
+                next_slot[service_id] = end_time
+                yield (
+                    first_booking + offset,
+                    service_id,
+                    rng.choice(customer_ids),
+                    rng.choices(list(BookingStatus), weights=[2, 2, 5, 1])[0],
+                    start_time,
+                    end_time,
+                    created_at,
+                )
+
+        def generate_reviews(count):
+            for offset in range(count):
+                yield (
+                    first_review + offset,
+                    rng.choice(service_ids),
+                    rng.choice(customer_ids),
+                    rng.choices(list(ReviewRating), weights=[1, 1, 2, 4, 6])[0],
+                    ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(3, 20))),
+                    random_datetime(rng, history_start, now),
+                )
+
+        load_in_batches(connection, User.__table__,
+                        ['id', 'username', 'email', 'password', 'phone', 'role', 'created_at'],
+                        generate_users, users, batch_size)
+        if services:
+            load_in_batches(connection, Service.__table__,
+                            ['id', 'title', 'description', 'owner_id', 'category_id', 'created_at', 'status',
+                             'latitude', 'longitude', 'geohash'],
+                            generate_services, services, batch_size)
+            load_in_batches(connection, Booking.__table__,
+                            ['id', 'service_id', 'user_id', 'status', 'start_time', 'end_time', 'created_at'],
+                            generate_bookings, bookings, batch_size)
+            load_in_batches(connection, Review.__table__,
+                            ['id', 'service_id', 'user_id', 'rating', 'comment', 'created_at'],
+                            generate_reviews, reviews, batch_size)
+        reset_sequences(connection)
+
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('ANALYZE'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk-load synthetic users, services, bookings and reviews.')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--services', type=int, default=200000)
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--reviews', type=int, default=500000)
+    parser.add_argument('--months', type=int, default=18, help='how far back created_at values go')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42, help='random seed, for reproducible data sets')
+    args = parser.parse_args()
+
+    if args.users < 1:
+        parser.error('--users must be at least 1.')
+
+    seed(args.users, args.services, args.bookings, args.reviews, args.months, args.batch_size, args.seed)
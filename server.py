@@ -1,29 +1,63 @@
+import os
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Imports from routes and middleware
 from routes.auth import auth_routes
 from routes.users import users_routes
-from routes.categories import categories_routes
+from routes.categories import categories_routes, warm_category_cache
 from routes.services import services_routes
 from routes.bookings import bookings_routes
+from routes.health import health_routes
 from middleware.verifyToken import verify_token
+from middleware.compression import compress_response
+from middleware.rateLimit import rate_limit, release_request
+from config.database import engine, warm_pool
 
-# Initialize the Flask app
-app = Flask(__name__)
-CORS(app)
+# Number of reverse proxies (load balancers) in front of the app whose
+# X-Forwarded-* headers are trusted; 0 when clients connect directly
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
 
-# Register the global middleware
-app.before_request(verify_token)
+def create_app():
+    # Initialize the Flask app
+    app = Flask(__name__)
+    CORS(app)
 
-# Register the blueprints
-app.register_blueprint(auth_routes)
-app.register_blueprint(users_routes)
-app.register_blueprint(categories_routes)
-app.register_blueprint(services_routes)
-app.register_blueprint(bookings_routes)
+    if TRUSTED_PROXY_HOPS > 0:
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app,
+            x_for=TRUSTED_PROXY_HOPS,
+            x_proto=TRUSTED_PROXY_HOPS,
+            x_host=TRUSTED_PROXY_HOPS
+        )
+
+    # Register the global middleware
+    app.before_request(verify_token)
+    app.before_request(rate_limit)
+    app.teardown_request(release_request)
+    app.after_request(compress_response)
+
+    # Register the blueprints
+    app.register_blueprint(auth_routes)
+    app.register_blueprint(users_routes)
+    app.register_blueprint(categories_routes)
+    app.register_blueprint(services_routes)
+    app.register_blueprint(bookings_routes)
+    app.register_blueprint(health_routes)
+
+    return app
+
+# Prepare a freshly forked worker before it takes traffic
+def warm_up(pool_size):
+    # Connections inherited from the parent process must not be shared
+    engine.dispose(close=False)
+    warm_pool(pool_size)
+    warm_category_cache()
+
+
+app = create_app()
 
 # run the server
 if __name__ == '__main__':
     app.run()
-
@@ -0,0 +1,90 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        if even:
+            middle = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= middle:
+                bits = bits * 2 + 1
+                lng_range[0] = middle
+            else:
+                bits = bits * 2
+                lng_range[1] = middle
+        else:
+            middle = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= middle:
+                bits = bits * 2 + 1
+                lat_range[0] = middle
+            else:
+                bits = bits * 2
+                lat_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+# Smallest geohash greater than every hash starting with prefix, or None
+def next_geohash_prefix(prefix):
+    prefix = prefix.rstrip(GEOHASH_ALPHABET[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(prefix[-1]) + 1]
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+# (min_lat, min_lng, max_lat, max_lng) containing every point within radius_km.
+# Boxes are clamped at the poles and the antimeridian rather than wrapped.
+def bounding_box(latitude, longitude, radius_km):
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    lat_delta = math.degrees(angular_radius)
+    cos_lat = math.cos(math.radians(latitude))
+    if math.sin(angular_radius) < cos_lat:
+        lng_delta = math.degrees(math.asin(math.sin(angular_radius) / cos_lat))
+    else:
+        lng_delta = 180.0
+    return (
+        max(-90.0, latitude - lat_delta),
+        max(-180.0, longitude - lng_delta),
+        min(90.0, latitude + lat_delta),
+        min(180.0, longitude + lng_delta),
+    )
+
+# A nearby search ORs one range per cell; more cells scan less outside the box
+MAX_COVERING_CELLS = 16
+
+# Geohash prefixes whose cells together cover the box, at the longest precision
+# where that takes at most MAX_COVERING_CELLS cells. None if no precision fits.
+def covering_geohash_prefixes(min_lat, min_lng, max_lat, max_lng):
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_bits = 5 * precision // 2
+        lng_bits = 5 * precision - lat_bits
+        cell_height = 180.0 / 2 ** lat_bits
+        cell_width = 360.0 / 2 ** lng_bits
+        # Row and column numbers of the cells holding the box corners
+        first_row = int((min_lat + 90.0) // cell_height)
+        last_row = min(int((max_lat + 90.0) // cell_height), 2 ** lat_bits - 1)
+        first_column = int((min_lng + 180.0) // cell_width)
+        last_column = min(int((max_lng + 180.0) // cell_width), 2 ** lng_bits - 1)
+        if (last_row - first_row + 1) * (last_column - first_column + 1) <= MAX_COVERING_CELLS:
+            return sorted(
+                encode_geohash(-90.0 + (row + 0.5) * cell_height, -180.0 + (column + 0.5) * cell_width, precision)
+                for row in range(first_row, last_row + 1)
+                for column in range(first_column, last_column + 1)
+            )
+    return None
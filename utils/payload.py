@@ -0,0 +1,35 @@
+from flask import request, jsonify
+
+# Parse the optional ?fields= sparse-fieldset parameter
+def requested_fields():
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+# Keep only the requested keys of a serialized row
+def select_fields(data, fields):
+    if fields is None:
+        return data
+    return {key: data[key] for key in fields if key in data}
+
+# Build the response for a single serialized object
+def object_response(data):
+    return jsonify(select_fields(data, requested_fields()))
+
+# Build the response for a list of serialized rows whose keys are `keys`.
+# ?layout=columnar sends the keys once and every row as an array of values;
+# the columns come from `keys`, so they are the same for empty listings.
+def listing_response(rows, keys):
+    fields = requested_fields()
+    rows = [select_fields(row, fields) for row in rows]
+
+    if request.args.get('layout') != 'columnar':
+        return jsonify(rows)
+
+    columns = list(keys) if fields is None else [field for field in fields if field in keys]
+
+    return jsonify({
+        'columns': columns,
+        'rows': [[row.get(column) for column in columns] for row in rows]
+    })
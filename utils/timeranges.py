@@ -0,0 +1,63 @@
+import datetime
+from sqlalchemy import func, and_
+from config.database import Booking, BookingStatus
+
+# Bookings in these states hold their time slot
+ACTIVE_STATUSES = [BookingStatus.PENDING, BookingStatus.ACCEPTED]
+
+# Parse an ISO 8601 timestamp into the naive UTC datetimes stored in the database
+def parse_timestamp(value):
+    if not value:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'Expected an ISO 8601 string, got {type(value).__name__}')
+    parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+# On PostgreSQL this is the same expression as the GiST index on bookings,
+# so the planner can use it; other databases compare the bounds directly
+def overlaps(dialect_name, start, end):
+    if dialect_name == 'postgresql':
+        return func.tsrange(Booking.start_time, Booking.end_time).op('&&')(func.tsrange(start, end))
+    return and_(Booking.start_time < end, Booking.end_time > start)
+
+# Active bookings of a service overlapping [start, end), earliest first
+def active_bookings_between(session, service_id, start, end):
+    return (
+        session.query(Booking)
+        .filter(
+            Booking.service_id == service_id,
+            Booking.status.in_(ACTIVE_STATUSES),
+            # Bookings made before scheduling existed have no time range;
+            # tsrange(NULL, NULL) would be unbounded and overlap everything
+            Booking.start_time.isnot(None),
+            overlaps(session.get_bind().dialect.name, start, end)
+        )
+        .order_by(Booking.start_time)
+    )
+
+# Gaps between the booked intervals inside [start, end)
+def free_intervals(start, end, booked):
+    intervals = []
+    cursor = start
+    for booked_start, booked_end in booked:
+        if booked_start > cursor:
+            intervals.append((cursor, min(booked_start, end)))
+        cursor = max(cursor, booked_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        intervals.append((cursor, end))
+    return intervals
+
+# Cut free intervals into fixed-length slots
+def split_slots(intervals, length):
+    slots = []
+    for interval_start, interval_end in intervals:
+        slot_start = interval_start
+        while slot_start + length <= interval_end:
+            slots.append((slot_start, slot_start + length))
+            slot_start += length
+    return slots
@@ -0,0 +1,39 @@
+import argparse
+import signal
+import threading
+import multiprocessing
+
+from config.database import engine
+from jobs.queue import work
+import jobs.handlers  # registers the job handlers
+
+
+def run_worker(poll_interval):
+    # Connections inherited from the parent process must not be shared
+    engine.dispose(close=False)
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+
+    work(poll_interval=poll_interval, should_stop=stopping.is_set)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run background job workers.')
+    parser.add_argument('--workers', type=int, default=2, help='number of worker processes')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='seconds to wait when the queue is empty')
+    args = parser.parse_args()
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.poll_interval,))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # Workers stop on their own after finishing the current job
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: [process.terminate() for process in processes])
+    for process in processes:
+        process.join()